@@ -4,8 +4,682 @@ import time
 import random
 import os
 import sys
-import io
-import uuid
+import itertools
+import threading
+import collections
+import functools
+import shutil
+import atexit
+import stat
+import selectors
+from enum import IntEnum
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps(obj):
+    """
+    Serialize obj to ASCII JSON bytes, using orjson when it is installed.
+
+    orjson writes non-ASCII text as raw UTF-8 (the other languages' readers
+    don't all decode stdin as UTF-8) and NaN/Infinity as null, so such
+    payloads go through json, which escapes the text and keeps the floats.
+    """
+    if orjson is not None:
+        try:
+            raw = orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            # orjson rejects some values json accepts (e.g. integers above 64 bits)
+            pass
+        else:
+            # A null may be a non-finite float, or just None
+            if raw.isascii() and b'null' not in raw:
+                return raw
+    return json.dumps(obj).encode('ascii')
+
+
+# Maps every digit to b'0' and anything else to b' ': a run of 20 b'0's is a
+# number too big for orjson, which reads integers beyond 64 bits as floats
+_DIGITS = bytes(0x30 if 0x30 <= i <= 0x39 else 0x20 for i in range(256))
+_LONG_NUMBER = b'0' * 20
+
+
+def _loads(raw):
+    """Deserialize JSON from bytes or str, using orjson when it is installed."""
+    if orjson is not None:
+        data = raw.encode('utf-8', 'surrogatepass') if isinstance(raw, str) else raw
+        if data.translate(_DIGITS).find(_LONG_NUMBER) < 0:
+            try:
+                return orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                # Only worth a second parse if json can read something orjson can't
+                # (NaN, Infinity); a malformed line raises straight away
+                if b'NaN' not in data and b'Infinity' not in data:
+                    raise
+    return json.loads(raw)
+
+
+_IS_WINDOWS = os.name == 'nt'
+_POSIX_SPAWN = getattr(subprocess, '_USE_POSIX_SPAWN', False) and not _IS_WINDOWS
+
+# Request keys only have to be unique within this process
+_key_counter = itertools.count(1)
+
+
+def _gen_key():
+    """Generate a unique key for request/response matching."""
+    return str(next(_key_counter))
+
+# Opt-in shared memory transport for large bytes-like payloads (POSIX only,
+# both sides must be the Python implementation with MANGLE_SHM_ENABLE=1)
+_SHM_ENABLED = os.environ.get('MANGLE_SHM_ENABLE') == '1' and not _IS_WINDOWS
+_SHM_THRESHOLD = 64 * 1024
+if _SHM_ENABLED:
+    from multiprocessing import shared_memory, resource_tracker
+
+def _prefixed(*prefix):
+    """Make a command builder that runs the target file behind a fixed prefix."""
+    def build(file, file_ext):
+        return [*prefix, file]
+    return build
+
+
+def _dotnet(file, file_ext):
+    """Run .dll assemblies through dotnet and anything else directly."""
+    return ['dotnet', file] if file_ext == '.dll' else [file]
+
+
+def _go(file, file_ext):
+    """Run .go sources through go run and anything else directly."""
+    return ['go', 'run', file] if file_ext == '.go' else [file]
+
+
+class Lang(IntEnum):
+    """
+    Canonical target languages.
+
+    Any of these can be passed as request(language=...) instead of a name
+    string, which skips alias resolution.
+    """
+
+    PYTHON = 0
+    JS = 1
+    RUBY = 2
+    C = 3
+    CPP = 4
+    CSHARP = 5
+    JAVA = 6
+    RUST = 7
+    GO = 8
+
+    def __str__(self):
+        return self.name
+
+
+# Accepted language names, matched case-insensitively
+_ALIASES = {
+    'PYTHON': Lang.PYTHON,
+    'PY': Lang.PYTHON,
+    'JAVASCRIPT': Lang.JS,
+    'JS': Lang.JS,
+    'NODE': Lang.JS,
+    'NODEJS': Lang.JS,
+    'RUBY': Lang.RUBY,
+    'RB': Lang.RUBY,
+    'C': Lang.C,
+    'CS': Lang.CSHARP,
+    'CPP': Lang.CPP,
+    'C#': Lang.CSHARP,
+    'C++': Lang.CPP,
+    'CSHARP': Lang.CSHARP,
+    'CPLUSPLUS': Lang.CPP,
+    'EXE': Lang.CPP,
+    'JAR': Lang.JAVA,
+    'JAVA': Lang.JAVA,
+    'RUST': Lang.RUST,
+    'RS': Lang.RUST,
+    'GO': Lang.GO,
+    'GOLANG': Lang.GO
+}
+# Common spellings resolve without building an uppercase copy
+_ALIASES.update({name.lower(): lang for name, lang in _ALIASES.items()})
+_ALIASES.update({name.capitalize(): lang for name, lang in list(_ALIASES.items())})
+
+
+def _canon(language):
+    """
+    Resolve a language name or Lang member to its Lang member.
+
+    Returns:
+        Lang|None: The language, or None if it isn't supported
+    """
+    if isinstance(language, Lang):
+        return language
+    lang = _ALIASES.get(language) if isinstance(language, str) else None
+    if lang is None:
+        lang = _ALIASES.get(str(language).upper())
+    return lang
+
+
+# Language registry: (valid extensions, must be executable, command builder)
+_LANG_SPEC = {
+    Lang.PYTHON: (('.py',), False, _prefixed('python')),
+    Lang.JS: (('.js',), False, _prefixed('node')),
+    Lang.RUBY: (('.rb',), False, _prefixed('ruby')),
+    Lang.C: (('.c', '.out', '.exe', ''), True, _prefixed()),
+    Lang.CPP: (('.cpp', '.cc', '.cxx', '.out', '.exe', ''), True, _prefixed()),
+    Lang.CSHARP: (('.exe', '.dll', ''), True, _dotnet),
+    Lang.JAVA: (('.jar',), False, _prefixed('java', '-jar')),
+    Lang.RUST: (('.rs', '.exe', '.out', ''), True, _prefixed()),
+    Lang.GO: (('.go', '.exe', '.out', ''), True, _go)
+}
+
+
+def _feed(pipe, payload):
+    """Write payload to a child's stdin and close it (run in a thread)."""
+    try:
+        pipe.write(payload)
+        pipe.close()
+    except (BrokenPipeError, OSError):
+        # Child exited without reading its whole input; the exit code reports it
+        pass
+
+
+def _drain(pipe, sink):
+    """Read a pipe to EOF into sink (run in a thread to avoid pipe-full deadlocks)."""
+    for chunk in pipe:
+        sink.append(chunk)
+    pipe.close()
+
+
+_READ_BITS = (stat.S_IRUSR, stat.S_IRGRP, stat.S_IROTH)
+_EXEC_BITS = (stat.S_IXUSR, stat.S_IXGRP, stat.S_IXOTH)
+
+
+def _permitted(st, bits):
+    """
+    Check a stat result's permission bits for this process's real uid/gid.
+
+    Only the mode bits are compared, as a cheap pre-check without another
+    syscall: ACLs, noexec mounts and read-only filesystems aren't looked at.
+    A target they block still fails when it is started, and that
+    PermissionError is reported the same way.
+
+    Args:
+        st (os.stat_result): Result of os.stat() on the file
+        bits (tuple): (user, group, other) permission bits to test
+
+    Returns:
+        bool: True if the mode bits grant the permission
+    """
+    if _IS_WINDOWS:
+        # Windows has no POSIX permission bits; os.access() accepted any existing file
+        return True
+
+    mode = st.st_mode
+    # Real ids, as the os.access() check this replaced used
+    uid = os.getuid()
+    if uid == 0:
+        # root may read anything, and execute anything with at least one x bit
+        return bits is _READ_BITS or bool(mode & (bits[0] | bits[1] | bits[2]))
+    if st.st_uid == uid:
+        return bool(mode & bits[0])
+    if st.st_gid == os.getgid() or st.st_gid in os.getgroups():
+        return bool(mode & bits[1])
+    return bool(mode & bits[2])
+
+
+@functools.lru_cache(maxsize=64)
+def _which(name, path):
+    """Resolve an executable name on PATH, cached per PATH value."""
+    return shutil.which(name, path=path) or name
+
+
+# Linux's default pipe capacity; smaller writes don't gain from a bigger pipe
+_DEFAULT_PIPE_SIZE = 65536
+
+
+@functools.lru_cache(maxsize=1)
+def _pipe_size():
+    """
+    Pipe buffer size to request on Linux: 1 MiB, capped by the system maximum.
+
+    Returns:
+        int: Size in bytes, or 0 where pipes can't be resized
+    """
+    if not sys.platform.startswith('linux'):
+        return 0
+    try:
+        with open('/proc/sys/fs/pipe-max-size') as f:
+            return min(int(f.read()), 1 << 20)
+    except (OSError, ValueError):
+        return 0
+
+
+def _grow_pipes(*pipes):
+    """
+    Enlarge pipe buffers (F_SETPIPE_SZ) so large payloads need fewer wakeups.
+
+    Args:
+        *pipes: File objects or descriptors; anything that isn't a resizable pipe is skipped
+    """
+    size = _pipe_size()
+    if not size:
+        return
+
+    import fcntl
+    for pipe in pipes:
+        try:
+            fd = pipe if isinstance(pipe, int) else pipe.fileno()
+            fcntl.fcntl(fd, getattr(fcntl, 'F_SETPIPE_SZ', 1031), size)
+        except (OSError, ValueError):
+            # Not a pipe, or over the per-user pipe memory limit
+            pass
+
+
+def _spawn(command, input_size=0):
+    """
+    Start command with piped stdin/stdout/stderr.
+
+    Enlarged pipes count against a per-user limit (past it, new pipes get a
+    single page), so only stdin is grown here, and only when the request is
+    too big for a default pipe. The target grows stdout itself when it first
+    writes a response that large.
+
+    On POSIX the call is shaped so CPython can use posix_spawn() instead of
+    fork()+exec(): the executable is given as a path and close_fds is off
+    (the pipes and all other Python-created fds are non-inheritable anyway).
+    Passing cwd, env, preexec_fn or similar options would disable it.
+
+    Args:
+        command (list): Program and arguments
+        input_size (int): Size of the request that will be written to stdin
+
+    Returns:
+        subprocess.Popen: The started process, with binary pipes
+    """
+    if not _POSIX_SPAWN:
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE
+        )
+        if input_size > _DEFAULT_PIPE_SIZE:
+            _grow_pipes(process.stdin)
+        return process
+
+    # posix_spawn is only used when the executable contains a directory part
+    executable = command[0]
+    if not os.path.dirname(executable):
+        executable = _which(executable, os.environ.get('PATH'))
+
+    process = subprocess.Popen(
+        [executable, *command[1:]],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        close_fds=False
+    )
+    if input_size > _DEFAULT_PIPE_SIZE:
+        _grow_pipes(process.stdin)
+    return process
+
+
+def _shm_put(data):
+    """
+    Copy a large bytes-like payload into a new shared memory segment.
+
+    Returns:
+        tuple: (descriptor dict, SharedMemory), or (None, None) to send data inline
+    """
+    if not _SHM_ENABLED or not isinstance(data, (bytes, bytearray, memoryview)):
+        return None, None
+
+    try:
+        view = memoryview(data).cast('B')
+    except TypeError:
+        # Non-contiguous memoryview
+        return None, None
+    if view.nbytes < _SHM_THRESHOLD:
+        return None, None
+
+    try:
+        shm = shared_memory.SharedMemory(create=True, size=view.nbytes)
+    except OSError:
+        return None, None
+    shm.buf[:view.nbytes] = view
+    return {"__shm__": shm.name, "off": 0, "len": view.nbytes}, shm
+
+
+def _is_shm(data):
+    """Return True if data is a shared memory descriptor made by _shm_put()."""
+    return _SHM_ENABLED and isinstance(data, dict) and "__shm__" in data
+
+
+def _shm_untrack(shm):
+    """Stop this process's resource tracker from unlinking shm when it exits."""
+    # The segment's lifetime is managed by the InputManager side instead
+    resource_tracker.unregister(shm._name, "shared_memory")
+
+
+def _shm_attach(desc):
+    """Attach to the segment described by desc without taking ownership of it."""
+    shm = shared_memory.SharedMemory(name=desc["__shm__"])
+    _shm_untrack(shm)
+    return shm
+
+
+def _shm_take(desc):
+    """Copy a payload out of a segment made by the other process and free it."""
+    shm = shared_memory.SharedMemory(name=desc["__shm__"])
+    try:
+        return bytes(shm.buf[desc["off"]:desc["off"] + desc["len"]])
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _accept(__data, key, sink):
+    """
+    Keep a parsed message if it is a response for key.
+
+    Returns:
+        dict|None: The message, or None if it belongs to another request
+    """
+    # Validate response has matching key or null key (for init errors)
+    # This ensures we only process responses meant for this request
+    if isinstance(__data, dict) and (__data.get('key') == key or __data.get('key') is None):
+        if not __data.get('final'):
+            if _is_shm(__data.get('data')):
+                __data['data'] = _shm_take(__data['data'])
+            sink.append(__data)
+        return __data
+    return None
+
+
+def _collect(line, key, sink):
+    """
+    Parse one stdout line and keep it if it is a response for key.
+
+    Returns:
+        dict|None: The parsed response, or None if the line was ignored
+    """
+    # Responses are JSON objects: skip anything else (e.g. debug prints) without parsing it
+    if line[:1] != b'{' and not line.lstrip().startswith(b'{'):
+        return None
+
+    try:
+        __data = _loads(line)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        # Ignore lines that aren't valid JSON (e.g., debug prints)
+        return None
+
+    return _accept(__data, key, sink)
+
+
+# Persistent workers use length-prefixed frames: a 4-byte big-endian length
+# followed by that many bytes of JSON. The caller announces them with this
+# byte at the start of the worker's stdin; without it serve() reads one JSON
+# request per line, as older callers send.
+_PROTOCOL_FRAMED = b'\x01'
+
+# serve() writes this once before its first frame. Anything the worker wrote
+# to stdout before serve() started is skipped up to here, so stray prints
+# can't be misread as a frame header.
+_SYNC_MARKER = b'\x00mangledotdev-sync\x00'
+_SYNC_SCAN_LIMIT = 1 << 20
+
+# Frames are JSON; bigger binary payloads belong in the shared memory transport
+_MAX_FRAME = 1 << 30
+
+
+def _frame_header(payload):
+    """
+    Build the length prefix for one frame.
+
+    Raises:
+        ValueError: payload is over _MAX_FRAME, which the reading side would reject
+    """
+    if len(payload) > _MAX_FRAME:
+        raise ValueError(f"message of {len(payload)} bytes is over the {_MAX_FRAME}-byte frame limit "
+                         f"of persistent workers; send it in parts with isUnique=False")
+    return len(payload).to_bytes(4, 'big')
+
+
+def _write_frame(pipe, payload):
+    """Write payload to a binary pipe as one length-prefixed frame."""
+    pipe.write(_frame_header(payload))
+    pipe.write(payload)
+
+
+def _skip_to_sync(pipe):
+    """
+    Discard bytes from a buffered binary pipe up to and including _SYNC_MARKER.
+
+    Returns:
+        bool: True once the marker is consumed, False at end of stream
+
+    Raises:
+        ValueError: The marker wasn't found within _SYNC_SCAN_LIMIT bytes
+    """
+    # Only buffered bytes are inspected, so nothing past the marker is consumed
+    tail = b''
+    skipped = 0
+    while True:
+        window = pipe.peek(1)
+        if not window:
+            return False
+
+        data = tail + window
+        index = data.find(_SYNC_MARKER)
+        if index >= 0:
+            pipe.read(index + len(_SYNC_MARKER) - len(tail))
+            return True
+
+        pipe.read(len(window))
+        skipped += len(window)
+        if skipped > _SYNC_SCAN_LIMIT:
+            raise ValueError("no sync marker from persistent worker")
+        tail = data[1 - len(_SYNC_MARKER):]
+
+
+def _read_frame(pipe):
+    """
+    Read one length-prefixed frame from a buffered binary pipe.
+
+    Returns:
+        bytes|None: The frame payload, or None at end of stream
+
+    Raises:
+        ValueError: The length prefix is implausible (the stream is out of sync)
+    """
+    header = pipe.read(4)
+    if len(header) < 4:
+        return None
+    size = int.from_bytes(header, 'big')
+    if size > _MAX_FRAME:
+        raise ValueError(f"invalid frame length {size} from persistent worker")
+    payload = pipe.read(size)
+    if len(payload) < size:
+        return None
+    return payload
+
+
+class _Worker:
+    """
+    A long-lived target process started for InputManager.request(persistent=True).
+
+    The target must run OutputManager.serve(), which reads one framed JSON
+    request at a time and ends the outputs of each request with a
+    {"key": ..., "final": true} marker. A target that doesn't (e.g. one using
+    init(), which waits for the end of stdin) is killed after START_TIMEOUT.
+    """
+
+    STDERR_LINES = 200
+    # Seconds a new worker has to reach serve(), including its own imports
+    START_TIMEOUT = 30
+
+    def __init__(self, command):
+        """Start the worker process and drain its stderr in the background."""
+        self.process = _spawn(command)
+        self.lock = threading.Lock()
+        self.stderr = collections.deque(maxlen=_Worker.STDERR_LINES)
+        self.drainer = threading.Thread(target=_drain, args=(self.process.stderr, self.stderr), daemon=True)
+        self.drainer.start()
+        self.synced = False
+        self.stdin_grown = False
+        self.sync_lock = threading.Lock()
+        self.error = None
+        # Sent along with the first request
+        self.process.stdin.write(_PROTOCOL_FRAMED)
+
+    def alive(self):
+        """Return True while the worker process is running."""
+        return self.process.poll() is None
+
+    def exchange(self, key, payload, sink):
+        """
+        Send one request and collect its responses into sink.
+
+        Returns:
+            bool: True if the final marker arrived, False if the worker exited
+                first or sent invalid data (it is then killed, see self.error)
+        """
+        if len(payload) > _DEFAULT_PIPE_SIZE and not self.stdin_grown:
+            # Grown for the first large request, as _spawn() does for one-shot targets
+            _grow_pipes(self.process.stdin)
+            self.stdin_grown = True
+
+        try:
+            _write_frame(self.process.stdin, payload)
+            self.process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            return False
+
+        try:
+            if not self.synced and not self.sync():
+                return False
+
+            while True:
+                frame = _read_frame(self.process.stdout)
+                if frame is None:
+                    return False
+                __data = _accept(_loads(frame), key, sink)
+                if __data is not None and __data.get('final') and __data.get('key') == key:
+                    return True
+        except ValueError as e:
+            # Out of sync (bad length or JSON): the stream can't be trusted any more
+            self.error = f"Error: persistent worker sent invalid data ({e}) and was stopped."
+            self.process.kill()
+            return False
+
+    def sync(self):
+        """
+        Wait for serve()'s sync marker, killing the worker if it doesn't arrive in time.
+
+        Returns:
+            bool: True once the worker is serving, False if it exited or timed out
+        """
+        timer = threading.Timer(_Worker.START_TIMEOUT, self.start_timeout)
+        timer.daemon = True
+        timer.start()
+        try:
+            found = _skip_to_sync(self.process.stdout)
+        finally:
+            timer.cancel()
+
+        with self.sync_lock:
+            # A timeout that fired meanwhile wins: the process is being killed
+            self.synced = found and self.error is None
+        return self.synced
+
+    def start_timeout(self):
+        """Timer callback: give up on a worker that never started serve()."""
+        with self.sync_lock:
+            if self.synced:
+                return
+            self.error = (f"Error: persistent worker didn't start OutputManager.serve() within "
+                          f"{_Worker.START_TIMEOUT}s and was stopped (targets using init() can't be persistent).")
+            self.process.kill()
+
+    def close(self, timeout=5):
+        """Ask the worker to exit, killing it if it doesn't within timeout seconds."""
+        with self.lock:
+            try:
+                _write_frame(self.process.stdin, _dumps({"cmd": "exit"}))
+                self.process.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+            try:
+                self.process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process.stdout.close()
+
+
+@functools.lru_cache(maxsize=256)
+def _resolve_command(language, file, stamp):
+    """
+    Validate file and build the command to execute, memoized per target.
+
+    Args:
+        language (str|Lang): Programming language/runtime
+        file (str): Path to file to execute
+        stamp (tuple|None): File mtime and ownership/mode from os.stat(), so
+            the cached command is recomputed whenever the file changes
+
+    Returns:
+        tuple: Command array for subprocess
+
+    Raises:
+        ValueError: Invalid file extension for language
+        FileNotFoundError: File does not exist
+        PermissionError: File not readable/executable
+    """
+    lang = _canon(language)
+
+    file_ext = os.path.splitext(file)[1].lower()
+
+    spec = _LANG_SPEC.get(lang)
+
+    # Extension validation - FIRST before file existence check
+    if spec is not None and file_ext not in spec[0]:
+        valid_extensions = spec[0]
+        expected = ', '.join([ext if ext else '(no extension)' for ext in valid_extensions])
+        raise ValueError(f"Invalid file '{file}' for language '{language}'. Expected: e.g. 'file{expected}'")
+
+    # File existence check - one stat() serves the type and permission checks
+    try:
+        st = os.stat(file)
+    except OSError:
+        raise FileNotFoundError(f"File not found: {file}") from None
+
+    if not stat.S_ISREG(st.st_mode):
+        raise ValueError(f"Path is not a file: {file}")
+
+    # Permission checks
+    compiled = spec is not None and spec[1]
+    if compiled:
+        if not _permitted(st, _EXEC_BITS):
+            raise PermissionError(f"File is not executable: {file}")
+    else:
+        if not _permitted(st, _READ_BITS):
+            raise PermissionError(f"File is not readable: {file}")
+
+    # Auto-add ./ for compiled executables if not present and not absolute path
+    if compiled and not os.path.isabs(file) and not file.startswith('./'):
+        file = './' + file
+
+    # Build command
+    if spec is None:
+        raise ValueError(f"Unsupported language: {language}")
+
+    return tuple(spec[2](file, file_ext))
 
 
 class InputManager:
@@ -21,12 +695,13 @@ class InputManager:
         request(): Send a request to another process
         get_response(): Get the full response object
         get_data(): Get the response data (returns None on error)
+        request_many(): Send several requests concurrently
+        shutdown(): Stop all persistent workers
+        clear_command_cache(): Revalidate target files on their next request
     """
-    
-    @staticmethod
-    def __genKey():
-        """Generate a unique key for request/response matching."""
-        return uuid.uuid4().hex
+
+    __workers = {}
+    __workers_lock = threading.Lock()
 
     def __init__(self):
         """Initialize a new InputManager instance."""
@@ -37,13 +712,17 @@ class InputManager:
         self.response = None
         self.__data = None
         self.__key = None
+        self.__shm = None
+        self.__pending_input = None
+        self.__stdout_buffer = None
+        self.__stderr = None
 
     def __get_command(self, language, file):
         """
         Validate file and build command to execute.
 
         Args:
-            language (str): Programming language/runtime
+            language (str|Lang): Programming language/runtime
             file (str): Path to file to execute
 
         Returns:
@@ -54,98 +733,225 @@ class InputManager:
             FileNotFoundError: File does not exist
             PermissionError: File not readable/executable
         """
-        lang_upper = str(language).upper()
-
         # On Windows, convert forward slashes to backslashes for file system operations
-        if os.name == 'nt':
+        if _IS_WINDOWS:
             file = file.replace('/', '\\')
 
-        file_ext = os.path.splitext(file)[1].lower()
-
-        # Extension validation - FIRST before file existence check
-        extension_map = {
-            'PYTHON': ['.py'],
-            'PY': ['.py'],
-            'JAVASCRIPT': ['.js'],
-            'JS': ['.js'],
-            'NODE': ['.js'],
-            'NODEJS': ['.js'],
-            'RUBY': ['.rb'],
-            'RB': ['.rb'],
-            'C': ['.c', '.out', '.exe', ''],
-            'CS': ['.exe', '.dll', ''],
-            'CPP': ['.cpp', '.cc', '.cxx', '.out', '.exe', ''],
-            'C#': ['.exe', '.dll', ''],
-            'C++': ['.cpp', '.cc', '.cxx', '.out', '.exe', ''],
-            'CSHARP': ['.exe', '.dll', ''],
-            'CPLUSPLUS': ['.cpp', '.cc', '.cxx', '.out', '.exe', ''],
-            'EXE': ['.cpp', '.cc', '.cxx', '.out', '.exe', ''],
-            'JAR': ['.jar'],
-            'JAVA': ['.jar'],
-            'RUST': ['.rs', '.exe', '.out', ''],
-            'RS': ['.rs', '.exe', '.out', ''],
-            'GO': ['.go', '.exe', '.out', ''],
-            'GOLANG': ['.go', '.exe', '.out', '']
+        # Cache keys must be hashable; other values only ever appear via str()
+        if not isinstance(language, (str, Lang)):
+            language = str(language)
+
+        # Repeated requests for an unchanged file reuse the validated command
+        try:
+            st = os.stat(file)
+            stamp = (st.st_mtime_ns, st.st_mode, st.st_uid, st.st_gid)
+        except OSError:
+            # _resolve_command() reports the problem
+            stamp = None
+
+        return list(_resolve_command(language, file, stamp))
+
+    @staticmethod
+    def clear_command_cache():
+        """Forget the validated commands memoized for previously requested files."""
+        _resolve_command.cache_clear()
+
+    def __exchange(self, command):
+        """
+        Run command once, send the request and collect responses.
+
+        Returns:
+            tuple: (returncode, stderr text)
+        """
+        self.__process = _spawn(command, len(self.__request))
+
+        # Feed stdin and drain stderr in the background so neither pipe can
+        # fill up and block the child while stdout is parsed line by line
+        stderr_sink = []
+        feeder = threading.Thread(target=_feed, args=(self.__process.stdin, self.__request), daemon=True)
+        drainer = threading.Thread(target=_drain, args=(self.__process.stderr, stderr_sink), daemon=True)
+        feeder.start()
+        drainer.start()
+
+        for line in self.__process.stdout:
+            _collect(line, self.__key, self.__response)
+
+        self.__process.stdout.close()
+        self.__process.wait()
+        feeder.join()
+        drainer.join()
+
+        return self.__process.returncode, b''.join(stderr_sink).decode('utf-8', errors='replace').strip()
+
+    def __exchange_worker(self, pool_key, command):
+        """
+        Send the request to the persistent worker for pool_key, starting it if needed.
+
+        Returns:
+            tuple: (returncode, stderr text) - returncode is 0 while the worker stays alive
+        """
+        with InputManager.__workers_lock:
+            worker = InputManager.__workers.get(pool_key)
+            if worker is None or not worker.alive():
+                worker = _Worker(command)
+                InputManager.__workers[pool_key] = worker
+
+        with worker.lock:
+            self.__process = worker.process
+            if worker.exchange(self.__key, self.__request, self.__response):
+                return 0, ""
+
+        # The worker exited or desynced before finishing the request: forget it and report why
+        with InputManager.__workers_lock:
+            if InputManager.__workers.get(pool_key) is worker:
+                del InputManager.__workers[pool_key]
+        if worker.process.poll() is None:
+            worker.process.kill()
+        worker.process.wait()
+        for pipe in (worker.process.stdin, worker.process.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+        worker.drainer.join(timeout=1)
+        errors = b''.join(worker.stderr).decode('utf-8', errors='replace').strip()
+        if worker.error:
+            errors = f"{worker.error}\n{errors}".strip()
+        return worker.process.returncode, errors
+
+    @classmethod
+    def shutdown(cls):
+        """Stop every persistent worker started with request(persistent=True)."""
+        with cls.__workers_lock:
+            workers = list(cls.__workers.values())
+            cls.__workers.clear()
+
+        for worker in workers:
+            worker.close()
+
+    def __prepare(self, isUnique, optionalOutput, data, language, file):
+        """
+        Validate the target and serialize the request.
+
+        Returns:
+            list: Command array for subprocess
+        """
+        self.__key = _gen_key()
+        command = self.__get_command(language, file)
+
+        # Large bytes-like data travels through shared memory when enabled
+        shm_desc, self.__shm = _shm_put(data)
+
+        self.__raw_request = {
+            "key": self.__key,
+            "optionalOutput": optionalOutput,
+            "isUnique": isUnique,
+            "data": shm_desc if shm_desc else data
+        }
+        self.__request = _dumps(self.__raw_request)
+        self.__response = []
+        return command
+
+    def __release_shm(self):
+        """Free the shared memory segment used for the request data, if any."""
+        if self.__shm is not None:
+            self.__shm.close()
+            self.__shm.unlink()
+            self.__shm = None
+
+    def __set_response(self, isUnique, optionalOutput, returncode, errors):
+        """
+        Build self.response from the target's exit status and collected responses.
+
+        Args:
+            isUnique (bool): Requested isUnique setting
+            optionalOutput (bool): Requested optionalOutput setting
+            returncode (int): Exit code of the target process
+            errors (str): Captured stderr text
+        """
+        response = {
+            "request_status": None,
+            "data": None,
+            "optionalOutput": optionalOutput,
+            "isUnique": isUnique,
+            "warnings": [],
+            "errors": []
         }
 
-        if lang_upper in extension_map:
-            valid_extensions = extension_map[lang_upper]
-            if file_ext not in valid_extensions:
-                expected = ', '.join([ext if ext else '(no extension)' for ext in valid_extensions])
-                raise ValueError(f"Invalid file '{file}' for language '{language}'. Expected: e.g. 'file{expected}'")
+        if returncode != 0:
+            response["request_status"] = False
+            response["errors"].append(f"Process exited with code {returncode}")
+            if errors:
+                response["errors"].append(f"stderr: {errors}")
+            response["warnings"].append("Warning: these kind of errors result from an error in the targeted script.")
+            self.response = response
+            return
 
-        # File existence check
-        if not os.path.exists(file):
-            raise FileNotFoundError(f"File not found: {file}")
+        if len(self.__response) != 0:
+            # Collect status, errors and data in a single pass
+            failure = False
+            error_list = response["errors"]
+            data_list = []
+            for i in self.__response:
+                if not i["request_status"]:
+                    failure = True
+                error_list.extend(i["errors"])
+                if i.get("batched"):
+                    # OutputManager.finalize() sent several outputs in one line
+                    data_list.extend(i["data"])
+                else:
+                    data_list.append(i["data"])
 
-        if not os.path.isfile(file):
-            raise ValueError(f"Path is not a file: {file}")
+            response["request_status"] = not failure
+            response["isUnique"] = self.__response[0]["isUnique"]
 
-        # Permission checks
-        compiled_langs = ['C', 'CS', 'CPP', 'C#', 'C++', 'CSHARP', 'CPLUSPLUS', 'EXE', 'RUST', 'RS', 'GO', 'GOLANG']
-        if lang_upper in compiled_langs:
-            if not os.access(file, os.X_OK):
-                raise PermissionError(f"File is not executable: {file}")
+            if response["isUnique"]:
+                if len(data_list) == 1:
+                    response["data"] = data_list[0]
+                else:
+                    response["request_status"] = False
+                    response["data"] = None
+                    response["errors"].append(f"Error: Expected 1 output (isUnique=True) but received {len(data_list)}.")
+            else:
+                response["data"] = data_list
+                
+        elif optionalOutput:
+            response["request_status"] = None
+            response["data"] = None
+            response["warnings"].append("Warning: the output setting is set to optional, and the targeted program didn't gave any output.")
         else:
-            if not os.access(file, os.R_OK):
-                raise PermissionError(f"File is not readable: {file}")
-
-        # Auto-add ./ for compiled executables if not present and not absolute path
-        if lang_upper in compiled_langs and not os.path.isabs(file) and not file.startswith('./'):
-            file = './' + file
-
-        # Build command
-        lang_map = {
-            'PYTHON': ['python', file],
-            'PY': ['python', file],
-            'JAVASCRIPT': ['node', file],
-            'JS': ['node', file],
-            'NODE': ['node', file],
-            'NODEJS': ['node', file],
-            'RUBY': ['ruby', file],
-            'RB': ['ruby', file],
-            'C': [file],
-            'CS': ['dotnet', file] if file_ext == '.dll' else [file],
-            'CPP': [file],
-            'C#': ['dotnet', file] if file_ext == '.dll' else [file],
-            'C++': [file],
-            'CSHARP': ['dotnet', file] if file_ext == '.dll' else [file],
-            'CPLUSPLUS': [file],
-            'EXE': [file],
-            'JAR': ['java', '-jar', file],
-            'JAVA': ['java', '-jar', file],
-            'RUST': [file],
-            'RS': [file],
-            'GO': ['go', 'run', file] if file_ext == '.go' else [file],
-            'GOLANG': ['go', 'run', file] if file_ext == '.go' else [file]
-        }
+            response["request_status"] = False
+            response["data"] = None
+            response["errors"].append("Error: OutputManager might not be used or not correctly.")
 
-        if lang_upper not in lang_map:
-            raise ValueError(f"Unsupported language: {language}")
+        self.response = response
 
-        return lang_map[lang_upper]
+    def __set_error(self, e, isUnique, optionalOutput):
+        """
+        Set self.response for a request that failed before getting a result.
 
-    def request(self, isUnique=True, optionalOutput=True, data: any=None, language: any=str, file: any=str):
+        Args:
+            e (Exception): The error raised
+            isUnique (bool): Requested isUnique setting
+            optionalOutput (bool): Requested optionalOutput setting
+        """
+        if isinstance(e, (FileNotFoundError, PermissionError, ValueError)):
+            warnings = ["Warning: targeted file not found or can't be executed, consider checking file informations and language dependencies."]
+            errors = [f"Error: {str(e)}"]
+        else:
+            warnings = []
+            errors = [f"Unexpected error: {str(e)}"]
+
+        self.response = {
+            "request_status": False,
+            "data": None,
+            "optionalOutput": optionalOutput,
+            "isUnique": isUnique,
+            "warnings": warnings,
+            "errors": errors
+        }
+
+    def request(self, isUnique=True, optionalOutput=True, data: any=None, language: any=str, file: any=str, persistent=False):
         """
         Send a request to another process.
         
@@ -153,8 +959,11 @@ class InputManager:
             isUnique (bool): Expect single output (True) or multiple (False)
             optionalOutput (bool): Output is optional (True) or required (False)
             data: Data to send (any JSON-serializable type)
-            language (str): Target language/runtime
+            language (str|Lang): Target language/runtime
             file (str): Path to target file
+            persistent (bool): Reuse a long-lived worker for (language, file)
+                instead of starting a new process. The target must be Python and
+                run OutputManager.serve(); call InputManager.shutdown() to stop workers.
             
         Sets:
             self.response (dict): Complete response with keys:
@@ -166,122 +975,205 @@ class InputManager:
                 - errors (list): Error messages
         """
         try:
-            self.__key = InputManager._InputManager__genKey()
-            command = self.__get_command(language, file)
-
-            self.__process = subprocess.Popen(
-                command,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-
-            self.__raw_request = {
-                "key": self.__key,
-                "optionalOutput": optionalOutput,
-                "isUnique": isUnique,
-                "data": data
-            }
-            self.__request = json.dumps(self.__raw_request)
-
-            response = {
-                "request_status": None,
-                "data": None,
-                "optionalOutput": optionalOutput,
-                "isUnique": isUnique,
-                "warnings": [],
-                "errors": []
-            }
-
-            output, errors = self.__process.communicate(input=self.__request)
-
-            if self.__process.returncode != 0:
-                response["request_status"] = False
-                response["errors"].append(f"Process exited with code {self.__process.returncode}")
-                if errors.strip():
-                    response["errors"].append(f"stderr: {errors.strip()}")
-                response["warnings"].append("Warning: these kind of errors result from an error in the targeted script.")
-                self.response = response
-                return
+            command = self.__prepare(isUnique, optionalOutput, data, language, file)
 
-            self.__response = []
-            for line in output.strip().split('\n'):
-                if not line.strip():
-                    continue
-                
-                try:
-                    __data = json.loads(line)
-                    
-                    # Validate response has matching key or null key (for init errors)
-                    # This ensures we only process responses meant for this request
-                    if isinstance(__data, dict) and (__data.get('key') == self.__key or __data.get('key') is None):
-                        self.__response.append(__data)
-                except json.JSONDecodeError:
-                    # Ignore lines that aren't valid JSON (e.g., debug prints)
-                    pass
-
-            if len(self.__response) != 0:
-                failure = False
-                for i in self.__response:
-                    if not i["request_status"]:
-                        failure = True
-
-                if not failure:
-                    response["request_status"] = True
+            try:
+                if persistent:
+                    lang = _canon(language)
+                    if lang is not Lang.PYTHON:
+                        raise ValueError(f"persistent=True needs OutputManager.serve(), which only the Python implementation provides (language: {lang})")
+                    pool_key = (lang, os.path.abspath(file))
+                    returncode, errors = self.__exchange_worker(pool_key, command)
                 else:
-                    response["request_status"] = False
+                    returncode, errors = self.__exchange(command)
+            finally:
+                self.__release_shm()
 
-                response["isUnique"] = self.__response[0]["isUnique"]
+            self.__set_response(isUnique, optionalOutput, returncode, errors)
 
-                for i in self.__response:
-                    for index, e in enumerate(i["errors"]):
-                        response["errors"].append(i["errors"][index])
-                
-                data_list = []
-                for i in self.__response:
-                    data_list.append(i["data"])
-                
-                if response["isUnique"]:
-                    if len(data_list) == 1:
-                        response["data"] = data_list[0]
-                    else:
-                        response["request_status"] = False
-                        response["data"] = None
-                        response["errors"].append(f"Error: Expected 1 output (isUnique=True) but received {len(data_list)}.")
-                else:
-                    response["data"] = data_list
-                    
-            elif optionalOutput:
-                response["request_status"] = None
-                response["data"] = None
-                response["warnings"].append("Warning: the output setting is set to optional, and the targeted program didn't gave any output.")
-            else:
-                response["request_status"] = False
-                response["data"] = None
-                response["errors"].append("Error: OutputManager might not be used or not correctly.")
+        except Exception as e:
+            self.__set_error(e, isUnique, optionalOutput)
+        return
 
-            self.response = response
+    @staticmethod
+    def request_many(requests):
+        """
+        Send several independent requests concurrently and wait for all of them.
+
+        All targets are started first; their pipes are then serviced from a
+        single thread with a selector (epoll/kqueue), so the total time is
+        close to the slowest target rather than the sum of all of them.
+
+        Args:
+            requests (list): One dict of request() keyword arguments per request
+                (isUnique, optionalOutput, data, language, file). persistent
+                may be given but must be False: every request gets its own process.
+
+        Returns:
+            list: The response dict of each request, in the same order. A request
+                with invalid arguments gets an error response; the others still run.
+        """
+        managers = [InputManager() for _ in requests]
+
+        if _IS_WINDOWS:
+            # Windows can't select() on pipes: fall back to one thread per request
+            threads = [threading.Thread(target=m.__request_entry, args=(r,)) for m, r in zip(managers, requests)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            return [m.response for m in managers]
+
+        selector = selectors.DefaultSelector()
+        running = []
+        try:
+            for manager, request in zip(managers, requests):
+                options = manager.__start(selector, request)
+                if options is not None:
+                    running.append((manager, options))
+
+            while selector.get_map():
+                for key, _ in selector.select():
+                    manager, kind = key.data
+                    manager.__service(selector, key, kind)
+        except BaseException:
+            # Don't leave started targets behind (e.g. on KeyboardInterrupt)
+            for manager, _ in running:
+                manager.__abort()
+            raise
+        finally:
+            selector.close()
+
+        for manager, options in running:
+            isUnique = options["isUnique"]
+            optionalOutput = options["optionalOutput"]
+            try:
+                manager.__process.wait()
+                manager.__release_shm()
+                errors = b''.join(manager.__stderr).decode('utf-8', errors='replace').strip()
+                manager.__set_response(isUnique, optionalOutput, manager.__process.returncode, errors)
+            except Exception as e:
+                manager.__set_error(e, isUnique, optionalOutput)
+
+        return [m.response for m in managers]
+
+    @staticmethod
+    def __options(request):
+        """
+        Check one request_many() entry and fill in request()'s defaults.
 
-        except (FileNotFoundError, PermissionError, ValueError) as e:
-            self.response = {
-                "request_status": False,
-                "data": None,
-                "optionalOutput": optionalOutput,
-                "isUnique": isUnique,
-                "warnings": ["Warning: targeted file not found or can't be executed, consider checking file informations and language dependencies."],
-                "errors": [f"Error: {str(e)}"]
-            }
+        Returns:
+            dict: isUnique, optionalOutput, data, language and file
+
+        Raises:
+            TypeError: Unknown argument, or persistent=True
+        """
+        options = {"isUnique": True, "optionalOutput": True, "data": None, "language": str, "file": str, "persistent": False}
+        unknown = [name for name in request if name not in options]
+        if unknown:
+            raise TypeError(f"request_many() got unexpected argument(s): {', '.join(map(str, unknown))}")
+        options.update(request)
+        if options.pop("persistent"):
+            raise TypeError("request_many() doesn't use persistent workers, call request(persistent=True) instead")
+        return options
+
+    def __request_entry(self, request):
+        """Run one request_many() entry with request(), on the Windows thread fallback."""
+        try:
+            options = InputManager.__options(request)
         except Exception as e:
-            self.response = {
-                "request_status": False,
-                "data": None,
-                "optionalOutput": optionalOutput,
-                "isUnique": isUnique,
-                "warnings": [],
-                "errors": [f"Unexpected error: {str(e)}"]
-            }
-        return
+            self.__set_error(e, True, True)
+            return
+        self.request(**options)
+
+    def __start(self, selector, request):
+        """
+        Start the target for request_many() and register its pipes with selector.
+
+        Returns:
+            dict|None: The request options if the process is running,
+                None if self.response already holds an error
+        """
+        isUnique = optionalOutput = True
+        try:
+            options = InputManager.__options(request)
+            isUnique, optionalOutput = options["isUnique"], options["optionalOutput"]
+            command = self.__prepare(**options)
+            self.__process = _spawn(command, len(self.__request))
+        except Exception as e:
+            self.__release_shm()
+            self.__set_error(e, isUnique, optionalOutput)
+            return None
+
+        self.__pending_input = memoryview(self.__request)
+        self.__stdout_buffer = bytearray()
+        self.__stderr = []
+        for pipe, kind, events in (
+            (self.__process.stdin, 'stdin', selectors.EVENT_WRITE),
+            (self.__process.stdout, 'stdout', selectors.EVENT_READ),
+            (self.__process.stderr, 'stderr', selectors.EVENT_READ)
+        ):
+            os.set_blocking(pipe.fileno(), False)
+            selector.register(pipe, events, (self, kind))
+        return options
+
+    def __abort(self):
+        """Kill and reap a request_many() target after the event loop failed."""
+        self.__process.kill()
+        self.__process.wait()
+        for pipe in (self.__process.stdin, self.__process.stdout, self.__process.stderr):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+        self.__release_shm()
+
+    def __service(self, selector, key, kind):
+        """Move data on one ready pipe of a request_many() target."""
+        if kind == 'stdin':
+            try:
+                written = os.write(key.fd, self.__pending_input)
+                self.__pending_input = self.__pending_input[written:]
+            except BlockingIOError:
+                return
+            except (BrokenPipeError, OSError):
+                # Child exited without reading its whole input; the exit code reports it
+                self.__pending_input = self.__pending_input[:0]
+            if not self.__pending_input:
+                selector.unregister(key.fileobj)
+                key.fileobj.close()
+            return
+
+        try:
+            chunk = os.read(key.fd, _pipe_size() or 65536)
+        except BlockingIOError:
+            return
+
+        if kind == 'stderr':
+            if chunk:
+                self.__stderr.append(chunk)
+            else:
+                selector.unregister(key.fileobj)
+                key.fileobj.close()
+            return
+
+        buffer = self.__stdout_buffer
+        if chunk:
+            # Only the new chunk can hold a newline: no rescan of a long partial line
+            newline = chunk.rfind(b'\n')
+            buffer += chunk
+            if newline < 0:
+                return
+            end = len(buffer) - len(chunk) + newline
+        else:
+            # EOF: whatever is left is the last line
+            selector.unregister(key.fileobj)
+            key.fileobj.close()
+            end = len(buffer)
+
+        for line in bytes(buffer[:end]).split(b'\n'):
+            _collect(line, self.__key, self.__response)
+        del buffer[:end + 1]
 
     def get_response(self):
         """
@@ -307,11 +1199,351 @@ class InputManager:
         return None
 
 
+def _read_stdin():
+    """
+    Read all of stdin, as raw bytes straight from the file descriptor when possible.
+
+    Returns:
+        bytearray|bytes|str: Everything written to stdin until EOF (str for text-only streams)
+    """
+    try:
+        fd = sys.stdin.fileno()
+    except (AttributeError, OSError, ValueError):
+        # stdin isn't backed by a file descriptor (e.g. replaced by a test harness)
+        binary = getattr(sys.stdin, 'buffer', None)
+        return sys.stdin.read() if binary is None else binary.read()
+
+    buf = bytearray()
+    chunk_size = _pipe_size() or 65536
+    while True:
+        chunk = os.read(fd, chunk_size)
+        if not chunk:
+            return buf
+        buf += chunk
+
+
+class _OutputState:
+    """
+    Per-process state and implementation behind OutputManager.
+
+    Uses __slots__ so the hot-path attribute reads are plain slot loads
+    instead of class dict lookups on name-mangled attributes.
+    """
+
+    __slots__ = (
+        'data', 'request', 'original_stdout', 'stdout_fd', 'request_status',
+        'optional', 'unique_state', 'init_error', 'errors', 'warnings', 'shm',
+        'shm_pending', 'stdout_grown', 'batch_mode', 'batch_exit_hook', 'pending', 'framed'
+    )
+
+    def __init__(self):
+        """Start with no request loaded."""
+        self.data = None
+        self.request = None
+        self.original_stdout = None
+        self.stdout_fd = None
+        self.stdout_grown = False
+        self.request_status = None
+        self.optional = None
+        self.unique_state = None
+        self.init_error = None
+        self.errors = []
+        self.warnings = []
+        self.shm = None
+        self.shm_pending = []
+        if _SHM_ENABLED:
+            # Unmap before interpreter teardown, where SharedMemory.__del__ would complain
+            atexit.register(self.release_shm)
+        self.batch_mode = False
+        self.batch_exit_hook = False
+        self.pending = []
+        self.framed = False
+
+    def init(self):
+        """Suppress stdout and load the request from the whole of stdin."""
+        self.suppress_stdout()
+        # Read the entire stdin (the JSON request from InputManager)
+        self.load(_loads(_read_stdin()))
+
+    def serve(self, handler):
+        """Load each request from stdin and call handler for it until told to exit."""
+        # Prints made before serve() must not reach the response channel
+        self.suppress_stdout(keep_pending=False)
+
+        for request in self.read_requests(getattr(sys.stdin, 'buffer', sys.stdin)):
+            if request.get("cmd") == "exit":
+                break
+
+            self.load(request)
+            handler(self.data)
+            self.finalize()
+            # Tell the caller this request has no more outputs
+            self.send({"key": request["key"], "final": True})
+
+    def read_requests(self, stdin):
+        """Yield parsed requests as framed messages or JSON lines, whichever the caller sends."""
+        # Text streams without peek() (e.g. io.StringIO) can only carry JSON lines
+        peek = getattr(stdin, 'peek', None)
+        self.framed = peek is not None and peek(1)[:1] == _PROTOCOL_FRAMED
+        if not self.framed:
+            for line in stdin:
+                if line.strip():
+                    yield _loads(line)
+            return
+
+        stdin.read(1)
+        self.write_raw(_SYNC_MARKER)
+        while True:
+            frame = _read_frame(stdin)
+            if frame is None:
+                return
+            yield _loads(frame)
+
+    def suppress_stdout(self, keep_pending=True):
+        """
+        Point stdout at the null device, keeping a duplicate of the real one for responses.
+
+        Works at the file descriptor level, so output from C extensions and
+        child processes is discarded too, without buffering anything in memory.
+
+        Args:
+            keep_pending (bool): Emit text printed so far (True) or discard it (False)
+        """
+        if self.original_stdout is not None:
+            # Already suppressed by an earlier init(); saving again would keep the null device
+            return
+
+        # Save original stdout so we can restore it later
+        self.original_stdout = sys.stdout
+        try:
+            if keep_pending:
+                # Emit anything printed so far before our responses
+                sys.stdout.flush()
+            fd = sys.stdout.fileno()
+        except (AttributeError, OSError, ValueError):
+            # stdout isn't backed by a file descriptor (e.g. replaced by a test harness):
+            # swap the object instead, and send() writes to the saved one
+            sys.stdout = open(os.devnull, 'w')
+            return
+
+        self.stdout_fd = os.dup(fd)
+        devnull_fd = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull_fd, fd)
+        os.close(devnull_fd)
+
+        if not keep_pending:
+            # Buffered prints now land on the null device
+            try:
+                sys.stdout.flush()
+            except (OSError, ValueError):
+                pass
+
+    def load(self, request):
+        """
+        Install a parsed request as the current one and reset response state.
+
+        Args:
+            request (dict): Parsed JSON request from InputManager
+        """
+        self.release_shm()
+
+        self.request = request
+        self.data = request["data"]
+        self.optional = request["optionalOutput"]
+
+        # Expose shared memory payloads as a zero-copy memoryview
+        if _is_shm(self.data):
+            desc = self.data
+            self.shm = _shm_attach(desc)
+            self.data = self.shm.buf[desc["off"]:desc["off"] + desc["len"]]
+
+        # Keep the public class attribute in sync
+        OutputManager.data = self.data
+
+        # Reset state for new request
+        self.errors = []
+        self.warnings = []
+        self.init_error = None
+        self.request_status = None
+        self.unique_state = None
+        self.pending = []
+
+    def release_shm(self):
+        """
+        Drop the view of the current request's segment and unmap it.
+
+        A segment that user code still holds views of can't be unmapped yet;
+        it stays referenced and is retried on the next call.
+        """
+        if self.shm is not None:
+            view, self.data = self.data, None
+            OutputManager.data = None
+            try:
+                view.release()
+            except BufferError:
+                # Something (e.g. a NumPy array) still exports the view
+                pass
+            self.shm_pending.append(self.shm)
+            self.shm = None
+
+        if self.shm_pending:
+            held = []
+            for shm in self.shm_pending:
+                try:
+                    shm.close()
+                except BufferError:
+                    held.append(shm)
+            self.shm_pending = held
+
+    def send(self, message):
+        """
+        Write one JSON message line to the real stdout.
+
+        Args:
+            message (dict): Message to serialize
+
+        Raises:
+            ValueError: A framed message is over the frame size limit
+        """
+        payload = _dumps(message)
+        if self.framed:
+            self.write_raw(_frame_header(payload) + payload)
+        else:
+            self.write_raw(payload + b"\n")
+
+    def write_raw(self, buf):
+        """
+        Write bytes to the real stdout.
+
+        Args:
+            buf (bytes): Data to write
+        """
+        if self.stdout_fd is None:
+            stream = self.original_stdout or sys.__stdout__
+            binary = getattr(stream, 'buffer', None)
+            if binary is None:
+                # Text-only stream (e.g. io.StringIO); the payload is UTF-8 JSON
+                stream.write(buf.decode('utf-8'))
+                stream.flush()
+            else:
+                binary.write(buf)
+                binary.flush()
+            return
+
+        if len(buf) > _DEFAULT_PIPE_SIZE and not self.stdout_grown:
+            # Only targets that send large responses spend pipe buffer budget
+            _grow_pipes(self.stdout_fd)
+            self.stdout_grown = True
+
+        # One unbuffered write, looping only if the pipe accepts part of it
+        view = memoryview(buf)
+        while view:
+            view = view[os.write(self.stdout_fd, view):]
+
+    def write(self, args, batched=False):
+        """
+        Write a JSON response for the current request.
+
+        Args:
+            args: Data to send in response
+            batched (bool): args is a list of several outputs
+        """
+        # Large bytes-like outputs go through shared memory; the caller frees the segment
+        shm_desc, shm = _shm_put(args)
+        if shm_desc:
+            _shm_untrack(shm)
+            shm.close()
+            args = shm_desc
+
+        # Build and write JSON response
+        request = self.request
+        response = {
+            "key": request["key"] if request else None,
+            "request_status": self.request_status,
+            "data": args,
+            "optionalOutput": self.optional,
+            "isUnique": request["isUnique"] if request else None,
+            "errors": self.errors,
+            "warnings": self.warnings
+        }
+        if batched:
+            response["batched"] = True
+        self.send(response)
+
+    def output(self, val):
+        """Send one output, enforcing the request's isUnique setting."""
+        request = self.request
+
+        # Check if OutputManager was initialized
+        if not request:
+            if not self.init_error:
+                if self.original_stdout:
+                    sys.stdout = self.original_stdout
+                else:
+                    sys.stdout = sys.__stdout__
+
+                self.request_status = False
+                self.errors.append("Error: OutputManager isn't initialized.")
+                self.write(args=None)
+                self.init_error = True
+            return
+
+        # Check if we can output based on isUnique setting
+        # unique_state tracks if we've already output once
+        if not request["isUnique"] and self.batch_mode:
+            # Sent together by finalize()
+            self.pending.append(val)
+        elif not self.unique_state or not request["isUnique"]:
+            self.request_status = True
+            self.write(args=val)
+        else:
+            # Multiple outputs when isUnique=True is an error
+            self.request_status = False
+            self.errors.append(f"Error: outputs out of bound (isUnique: {self.unique_state}).")
+            self.write(args=val)
+
+        # Mark that we've output once
+        self.unique_state = request["isUnique"]
+
+    def output_many(self, values):
+        """Send values as one batched line, or one by one for isUnique=True requests."""
+        if not self.request or self.request["isUnique"]:
+            for val in values:
+                self.output(val)
+            return
+
+        self.pending.extend(values)
+        self.finalize()
+
+    def batch_output(self, enabled):
+        """Turn buffering of isUnique=False outputs on or off."""
+        self.batch_mode = enabled
+        if not enabled:
+            # Buffered values go before any later unbuffered output
+            self.finalize()
+        elif not self.batch_exit_hook:
+            atexit.register(self.finalize)
+            self.batch_exit_hook = True
+
+    def finalize(self):
+        """Send all buffered outputs as one response line."""
+        if not self.pending:
+            return
+
+        self.request_status = True
+        self.write(args=self.pending, batched=True)
+        self.pending = []
+
+
+_om = _OutputState()
+
+
 class OutputManager:
     """
     Manages receiving requests from other processes and sending responses.
     
-    This is a class-based/static manager - all methods are class methods.
+    This is a class-based/static manager - all methods are static methods
+    backed by a single per-process state object.
     Must call init() before using.
     
     Class Attributes:
@@ -320,76 +1552,40 @@ class OutputManager:
     Class Methods:
         init(): Initialize and read request from stdin
         output(val): Send response back via stdout
+        output_many(values): Send several outputs in one response line
+        batch_output(enabled): Buffer outputs until finalize()
+        finalize(): Send buffered outputs
+        serve(handler): Handle requests in a loop for persistent callers
     """
     
-    __original_stdout = None
-    __request = None
-    __data = None
     data = None
-    __request_status = None
-    __optional = None
-    __unique_state = None
-    __init_error = None
-    __errors = []
-    __warnings = []
 
-    @classmethod
-    def init(cls):
+    @staticmethod
+    def init():
         """
         Initialize OutputManager and read request from stdin.
         
         Must be called before using output() or accessing data.
         Suppresses stdout to prevent pollution of JSON protocol.
         """
-        # Save original stdout so we can restore it later
-        cls.__original_stdout = sys.stdout
-        # Redirect stdout to StringIO to suppress all print statements
-        sys.stdout = io.StringIO()
-        # Read the entire stdin (the JSON request from InputManager)
-        cls.__request = sys.stdin.read()
-        cls.__data = json.loads(cls.__request)
-        cls.data = cls.__data["data"]
-        cls.__optional = cls.__data["optionalOutput"]
-        
-        # Reset state for new request
-        cls.__errors = []
-        cls.__warnings = []
-        cls.__init_error = None
-        cls.__request_status = None
-        cls.__unique_state = None
+        _om.init()
 
-    @classmethod
-    def __write(cls, args, _data):
+    @staticmethod
+    def serve(handler):
         """
-        Internal method to write JSON response to stdout.
-        
+        Handle requests in a loop for InputManager.request(persistent=True).
+
+        Reads requests from stdin and calls handler(data) for each; the
+        handler sends its response(s) with output() as usual. Returns when
+        stdin is closed or InputManager.shutdown() is called.
+
         Args:
-            args: Data to send in response
-            _data: Request data for key/metadata
+            handler (callable): Function called with the request data
         """
-        # Restore original stdout to actually write the response
-        if cls.__original_stdout:
-            sys.stdout = cls.__original_stdout
-        else:
-            sys.stdout = sys.__stdout__
-        
-        # Build and write JSON response
-        response = json.dumps({
-            "key": _data["key"] if _data else None,
-            "request_status": cls.__request_status, 
-            "data": args,
-            "optionalOutput": cls.__optional,
-            "isUnique": _data["isUnique"] if _data else None,
-            "errors": cls.__errors, 
-            "warnings": cls.__warnings
-        })
-        
-        sys.stdout.write(response)
-        sys.stdout.write("\n")
-        sys.stdout.flush()
+        _om.serve(handler)
 
-    @classmethod
-    def output(cls, val):
+    @staticmethod
+    def output(val):
         """
         Send response back to the calling process.
         
@@ -400,32 +1596,41 @@ class OutputManager:
             Can be called multiple times if isUnique=False in request.
             Will error if called multiple times when isUnique=True.
         """
-        # Check if OutputManager was initialized
-        if not cls.__data:
-            if not cls.__init_error:
-                if cls.__original_stdout:
-                    sys.stdout = cls.__original_stdout
-                else:
-                    sys.stdout = sys.__stdout__
+        _om.output(val)
 
-                cls.__request_status = False
-                cls.__errors.append("Error: OutputManager isn't initialized.")
-                cls._OutputManager__write(args=None, _data=cls.__data)
-                cls.__init_error = True
+    @staticmethod
+    def output_many(values):
+        """
+        Send several outputs at once for a request with isUnique=False.
 
-        else:
-            # Check if we can output based on isUnique setting
-            # unique_state tracks if we've already output once
-            if not cls.__unique_state or not cls.__data["isUnique"]:
-                cls.__request_status = True
-                cls._OutputManager__write(args=val, _data=cls.__data)
-            else:
-                # Multiple outputs when isUnique=True is an error
-                cls.__request_status = False
-                cls.__errors.append(f"Error: outputs out of bound (isUnique: {cls.__unique_state}).")
-                cls._OutputManager__write(args=val, _data=cls.__data)
-
-            # Mark that we've output once
-            cls.__unique_state = cls.__data["isUnique"]
-            # Re-suppress stdout after writing response
-            sys.stdout = io.StringIO()
\ No newline at end of file
+        The values are written as one response line instead of one line each.
+        For isUnique=True requests this is the same as calling output() per value.
+
+        Args:
+            values (iterable): Data to send (each any JSON-serializable type)
+
+        Note:
+            Batched lines are only understood by the Python InputManager.
+        """
+        _om.output_many(values)
+
+    @staticmethod
+    def batch_output(enabled=True):
+        """
+        Buffer outputs of isUnique=False requests until finalize() is called.
+
+        Buffered outputs are sent automatically when the process exits, when
+        batching is turned off, or after each request when using serve().
+
+        Args:
+            enabled (bool): Turn batching on (True) or off (False)
+
+        Note:
+            Batched lines are only understood by the Python InputManager.
+        """
+        _om.batch_output(enabled)
+
+    @staticmethod
+    def finalize():
+        """Send all outputs buffered since the last finalize() as one response line."""
+        _om.finalize()
\ No newline at end of file
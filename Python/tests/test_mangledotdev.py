@@ -0,0 +1,682 @@
+"""
+Behavior tests for mangledotdev.py.
+
+Every test starts real Python targets, written to a temporary directory, so
+both InputManager and OutputManager run exactly as they do across languages.
+
+Run from the Python directory:
+    python -m unittest discover -s tests
+"""
+
+import io
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+import types
+import unittest
+import unittest.mock
+
+MODULE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MODULE_DIR)
+
+import mangledotdev
+from mangledotdev import InputManager
+
+HEADER = f"import sys, os\nsys.path.insert(0, {MODULE_DIR!r})\nfrom mangledotdev import OutputManager\n"
+
+TARGETS = {
+    "echo.py": """
+        print("before init")
+        OutputManager.init()
+        print("after init")
+        OutputManager.output(OutputManager.data)
+    """,
+    "multi.py": """
+        OutputManager.init()
+        for i in range(OutputManager.data):
+            OutputManager.output(i)
+    """,
+    "fdnoise.py": """
+        import subprocess
+        OutputManager.init()
+        os.write(1, b'{"key": null, "request_status": true, "data": "spoof"}\\n')
+        subprocess.run([sys.executable, "-c", "print('child')"])
+        OutputManager.output(OutputManager.data)
+    """,
+    "crash.py": """
+        OutputManager.init()
+        raise SystemExit("boom")
+    """,
+    "worker.py": """
+        import mangledotdev
+
+        print("loading model...")
+        sys.stdout.write("partial \\x00mangledotdev-syn")
+
+        def handle(data):
+            print("noise")
+            if data == "pid":
+                OutputManager.output(os.getpid())
+            elif data == "die":
+                raise SystemExit("dead")
+            elif data == "junk":
+                # Bypass the framing, as a misbehaving extension writing to the real stdout would
+                os.write(mangledotdev._om.stdout_fd, b"load")
+                OutputManager.output(data)
+            elif isinstance(data, int):
+                for i in range(data):
+                    OutputManager.output(i)
+            else:
+                OutputManager.output(data)
+
+        OutputManager.serve(handle)
+    """,
+    "batch.py": """
+        OutputManager.init()
+        OutputManager.batch_output(True)
+        for i in range(OutputManager.data):
+            OutputManager.output(i)
+    """,
+    "batch_toggle.py": """
+        OutputManager.init()
+        OutputManager.batch_output(True)
+        OutputManager.output(0)
+        OutputManager.output(1)
+        OutputManager.finalize()
+        OutputManager.output(2)
+        OutputManager.batch_output(False)
+        OutputManager.output(3)
+    """,
+    "many.py": """
+        OutputManager.init()
+        OutputManager.output_many(range(OutputManager.data))
+    """,
+    "batch_worker.py": """
+        def handle(data):
+            OutputManager.batch_output(True)
+            for i in range(data):
+                OutputManager.output(i)
+
+        OutputManager.serve(handle)
+    """,
+    "pipe_sizes.py": """
+        import fcntl
+        import mangledotdev
+        F_GETPIPE_SZ = 1032
+
+        def sizes():
+            return [fcntl.fcntl(fd, F_GETPIPE_SZ) for fd in (0, mangledotdev._om.stdout_fd, 2)]
+
+        OutputManager.init()
+        before = sizes()
+        if OutputManager.data == "large response":
+            OutputManager.output("x" * (1 << 20))
+        OutputManager.output([before, sizes()])
+    """,
+    "slow.py": """
+        import time
+        OutputManager.init()
+        time.sleep(1)
+        OutputManager.output(OutputManager.data)
+    """,
+    "reverse.py": """
+        OutputManager.init()
+        data = OutputManager.data
+        OutputManager.output(bytes(data)[::-1] if isinstance(data, memoryview) else repr(type(data)))
+    """,
+    "reverse_worker.py": """
+        def handle(data):
+            OutputManager.output(bytes(data)[::-1] if isinstance(data, memoryview) else repr(type(data)))
+
+        OutputManager.serve(handle)
+    """,
+}
+
+target_dir = None
+
+
+def setUpModule():
+    global target_dir
+    target_dir = tempfile.mkdtemp(prefix="mangledotdev-tests-")
+    for name, body in TARGETS.items():
+        with open(os.path.join(target_dir, name), "w") as f:
+            f.write(HEADER + textwrap.dedent(body))
+    # Only validated, never run
+    open(os.path.join(target_dir, "noop.js"), "w").close()
+
+
+def tearDownModule():
+    InputManager.shutdown()
+    shutil.rmtree(target_dir, ignore_errors=True)
+
+
+def target(name):
+    return os.path.join(target_dir, name)
+
+
+def request(data=None, file="echo.py", language="python", **kwargs):
+    """Run one request against a test target and return its response."""
+    manager = InputManager()
+    manager.request(data=data, language=language, file=target(file), **kwargs)
+    return manager.get_response()
+
+
+def within(seconds, fn, *args, **kwargs):
+    """Call fn in a thread and fail instead of hanging if it takes too long."""
+    result = {}
+    thread = threading.Thread(target=lambda: result.setdefault("value", fn(*args, **kwargs)), daemon=True)
+    thread.start()
+    thread.join(seconds)
+    if thread.is_alive():
+        raise AssertionError(f"call didn't return within {seconds}s")
+    return result["value"]
+
+
+class OneShotTests(unittest.TestCase):
+
+    def test_round_trip_ignores_prints(self):
+        response = request({"text": "é😀", "n": [1, 2.5, None]})
+        self.assertEqual(response["errors"], [])
+        self.assertTrue(response["request_status"])
+        self.assertEqual(response["data"], {"text": "é😀", "n": [1, 2.5, None]})
+
+    def test_multiple_outputs(self):
+        response = request(3, "multi.py", isUnique=False)
+        self.assertTrue(response["request_status"])
+        self.assertEqual(response["data"], [0, 1, 2])
+
+    def test_too_many_outputs_for_unique(self):
+        response = request(2, "multi.py")
+        self.assertFalse(response["request_status"])
+        self.assertIsNone(response["data"])
+
+    def test_crash_reports_stderr(self):
+        response = request(1, "crash.py")
+        self.assertFalse(response["request_status"])
+        self.assertIn("Process exited with code 1", response["errors"])
+        self.assertIn("stderr: boom", response["errors"])
+
+    def test_fd_level_output_suppressed(self):
+        response = request("real", "fdnoise.py")
+        self.assertEqual(response["errors"], [])
+        self.assertEqual(response["data"], "real")
+
+    def test_values_survive_round_trip(self):
+        response = request([float("nan"), float("inf"), 2 ** 100, "é😀", None])
+        self.assertTrue(response["request_status"])
+        nan, inf, big, text, none = response["data"]
+        self.assertTrue(math.isnan(nan))
+        self.assertEqual([inf, big, text, none], [float("inf"), 2 ** 100, "é😀", None])
+
+    def test_missing_file(self):
+        response = request(1, "missing.py")
+        self.assertFalse(response["request_status"])
+        self.assertTrue(response["errors"][0].startswith("Error: File not found"))
+
+
+@unittest.skipIf(os.name == "nt", "Windows has no POSIX permission bits")
+class PermittedTests(unittest.TestCase):
+    """_permitted() against fake stat results, as seen by different real ids."""
+
+    READ = mangledotdev._READ_BITS
+    EXEC = mangledotdev._EXEC_BITS
+
+    def check(self, mode, bits, uid=1000, gid=1000, groups=(), st_uid=1000, st_gid=1000):
+        st = types.SimpleNamespace(st_mode=mode, st_uid=st_uid, st_gid=st_gid)
+        with unittest.mock.patch("os.getuid", return_value=uid), \
+                unittest.mock.patch("os.getgid", return_value=gid), \
+                unittest.mock.patch("os.getgroups", return_value=list(groups)):
+            return mangledotdev._permitted(st, bits)
+
+    def test_owner_bits(self):
+        self.assertTrue(self.check(0o400, self.READ))
+        self.assertTrue(self.check(0o100, self.EXEC))
+        # The owner class applies even when group/other would allow it
+        self.assertFalse(self.check(0o044, self.READ))
+        self.assertFalse(self.check(0o011, self.EXEC))
+
+    def test_group_bits(self):
+        self.assertTrue(self.check(0o040, self.READ, uid=1001))
+        self.assertTrue(self.check(0o010, self.EXEC, uid=1001, gid=5, groups=[1000]))
+        self.assertFalse(self.check(0o404, self.READ, uid=1001))
+
+    def test_other_bits(self):
+        self.assertTrue(self.check(0o004, self.READ, uid=1001, gid=1001))
+        self.assertTrue(self.check(0o001, self.EXEC, uid=1001, gid=1001))
+        self.assertFalse(self.check(0o770, self.EXEC, uid=1001, gid=1001))
+
+    def test_root(self):
+        self.assertTrue(self.check(0o000, self.READ, uid=0))
+        self.assertTrue(self.check(0o001, self.EXEC, uid=0))
+        self.assertFalse(self.check(0o644, self.EXEC, uid=0))
+
+    def test_uses_real_ids(self):
+        with unittest.mock.patch("os.geteuid", return_value=1000), unittest.mock.patch("os.getegid", return_value=1000):
+            self.assertFalse(self.check(0o400, self.READ, uid=1001, gid=1001))
+
+
+class LangTests(unittest.TestCase):
+
+    def test_aliases_resolve_case_insensitively(self):
+        for name in ("python", "PY", "Python", "pY"):
+            self.assertIs(mangledotdev._canon(name), mangledotdev.Lang.PYTHON)
+        for name, lang in (("node", "JS"), ("C#", "CSHARP"), ("c++", "CPP"), ("Golang", "GO"), ("jar", "JAVA")):
+            self.assertIs(mangledotdev._canon(name), mangledotdev.Lang[lang])
+
+    def test_members_and_unknown_names(self):
+        self.assertIs(mangledotdev._canon(mangledotdev.Lang.RUST), mangledotdev.Lang.RUST)
+        self.assertIsNone(mangledotdev._canon("cobol"))
+        self.assertIsNone(mangledotdev._canon(str))
+        self.assertEqual(str(mangledotdev.Lang.CSHARP), "CSHARP")
+
+    def test_request_with_lang_member(self):
+        manager = InputManager()
+        manager.request(data="x", language=mangledotdev.Lang.PYTHON, file=target("echo.py"))
+        self.assertEqual(manager.get_data(), "x")
+
+    def test_unsupported_language(self):
+        response = request(1, language="cobol")
+        self.assertFalse(response["request_status"])
+        self.assertEqual(response["errors"], ["Error: Unsupported language: cobol"])
+
+
+@unittest.skipIf(os.name == "nt", "uses POSIX permission bits")
+class CommandCacheTests(unittest.TestCase):
+    """The memoized command must follow changes to the target file."""
+
+    def setUp(self):
+        self.file = os.path.join(target_dir, "tool.out")
+        with open(self.file, "w") as f:
+            f.write("#!/bin/sh\ncat > /dev/null\n")
+        os.chmod(self.file, 0o755)
+        self.addCleanup(os.remove, self.file)
+        InputManager.clear_command_cache()
+
+    def errors(self):
+        return request(1, "tool.out", language="c")["errors"]
+
+    def misses(self):
+        return mangledotdev._resolve_command.cache_info().misses
+
+    def test_repeated_requests_hit_cache(self):
+        self.assertEqual(self.errors(), [])
+        misses = self.misses()
+        self.assertEqual(self.errors(), [])
+        self.assertEqual(self.misses(), misses)
+
+    def test_chmod_invalidates(self):
+        self.assertEqual(self.errors(), [])
+        os.chmod(self.file, 0o644)
+        self.assertEqual(self.errors(), [f"Error: File is not executable: {self.file}"])
+        os.chmod(self.file, 0o755)
+        self.assertEqual(self.errors(), [])
+
+    def test_mtime_invalidates(self):
+        self.errors()
+        misses = self.misses()
+        st = os.stat(self.file)
+        os.utime(self.file, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        self.errors()
+        self.assertEqual(self.misses(), misses + 1)
+
+    def test_removed_file_is_reported(self):
+        self.assertEqual(self.errors(), [])
+        os.rename(self.file, self.file + ".moved")
+        self.addCleanup(os.rename, self.file + ".moved", self.file)
+        self.assertEqual(self.errors(), [f"Error: File not found: {self.file}"])
+
+    def test_clear_command_cache(self):
+        self.errors()
+        self.assertEqual(mangledotdev._resolve_command.cache_info().currsize, 1)
+        InputManager.clear_command_cache()
+        self.assertEqual(mangledotdev._resolve_command.cache_info().currsize, 0)
+        # Clearing also resets the counters: the next request is the first miss
+        self.errors()
+        self.assertEqual(self.misses(), 1)
+
+
+class BatchTests(unittest.TestCase):
+
+    def test_batch_output(self):
+        response = request(5, "batch.py", isUnique=False)
+        self.assertTrue(response["request_status"])
+        self.assertEqual(response["data"], [0, 1, 2, 3, 4])
+
+    def test_finalize_and_turning_batching_off_keep_order(self):
+        response = request(None, "batch_toggle.py", isUnique=False)
+        self.assertEqual(response["data"], [0, 1, 2, 3])
+
+    def test_output_many(self):
+        response = request(4, "many.py", isUnique=False)
+        self.assertEqual(response["data"], [0, 1, 2, 3])
+
+    def test_output_many_unique(self):
+        self.assertEqual(request(1, "many.py")["data"], 0)
+        self.assertFalse(request(2, "many.py")["request_status"])
+
+    def test_persistent_worker_flushes_each_request(self):
+        try:
+            self.assertEqual(within(30, request, 3, "batch_worker.py", isUnique=False, persistent=True)["data"], [0, 1, 2])
+            self.assertEqual(within(30, request, 2, "batch_worker.py", isUnique=False, persistent=True)["data"], [0, 1])
+        finally:
+            InputManager.shutdown()
+
+
+@unittest.skipUnless(sys.platform.startswith("linux") and mangledotdev._pipe_size(), "pipes are only resized on Linux")
+class PipeSizeTests(unittest.TestCase):
+
+    def setUp(self):
+        read_fd, write_fd = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        self.addCleanup(os.close, write_fd)
+        import fcntl
+        self.default = fcntl.fcntl(read_fd, 1032)
+        self.grown = mangledotdev._pipe_size()
+
+    def sizes(self, data):
+        response = request(data, "pipe_sizes.py", isUnique=False)
+        self.assertEqual(response["errors"], [])
+        return response["data"][-1]
+
+    def test_small_request_keeps_default_pipes(self):
+        self.assertEqual(self.sizes("small"), [[self.default] * 3] * 2)
+
+    def test_large_request_grows_stdin_only(self):
+        self.assertEqual(self.sizes("x" * (1 << 20)), [[self.grown, self.default, self.default]] * 2)
+
+    def test_large_response_grows_stdout_when_sent(self):
+        before, after = self.sizes("large response")
+        self.assertEqual(before, [self.default] * 3)
+        self.assertEqual(after, [self.default, self.grown, self.default])
+
+
+class JsonTests(unittest.TestCase):
+    """_dumps/_loads must behave the same with and without orjson."""
+
+    BACKENDS = [("orjson", mangledotdev.orjson), ("json", None)]
+
+    def backends(self):
+        for name, module in self.BACKENDS:
+            if name == "orjson" and module is None:
+                continue
+            with self.subTest(backend=name), unittest.mock.patch.object(mangledotdev, "orjson", module):
+                yield
+
+    def test_dumps_is_ascii(self):
+        value = {"text": "é漢😀", "n": [1, 2.5, None], "1": True}
+        for _ in self.backends():
+            raw = mangledotdev._dumps(value)
+            self.assertTrue(raw.isascii())
+            self.assertEqual(json.loads(raw), value)
+
+    def test_non_finite_floats(self):
+        for _ in self.backends():
+            nan, inf, ninf = mangledotdev._loads(mangledotdev._dumps([float("nan"), float("inf"), float("-inf")]))
+            self.assertTrue(math.isnan(nan))
+            self.assertEqual([inf, ninf], [float("inf"), float("-inf")])
+
+    def test_big_integers_stay_exact(self):
+        for _ in self.backends():
+            self.assertEqual(mangledotdev._loads(b"[123456789012345678901234567890, 2]"), [123456789012345678901234567890, 2])
+            self.assertEqual(mangledotdev._loads(mangledotdev._dumps(-2 ** 70)), -2 ** 70)
+
+    def test_loads_accepts_str_and_bytearray(self):
+        for _ in self.backends():
+            self.assertEqual(mangledotdev._loads('{"a": "é"}'), {"a": "é"})
+            self.assertEqual(mangledotdev._loads(bytearray(b"[1]")), [1])
+
+    def test_malformed_input_raises(self):
+        for _ in self.backends():
+            with self.assertRaises(json.JSONDecodeError):
+                mangledotdev._loads(b"{bad")
+
+
+class PersistentTests(unittest.TestCase):
+
+    def tearDown(self):
+        InputManager.shutdown()
+
+    def test_worker_is_reused(self):
+        first = within(30, request, "pid", "worker.py", persistent=True)
+        second = within(30, request, "pid", "worker.py", persistent=True)
+        self.assertEqual(first["errors"], [])
+        self.assertTrue(first["request_status"])
+        self.assertEqual(first["data"], second["data"])
+
+    def test_prints_before_serve_are_dropped(self):
+        self.assertEqual(within(30, request, "é", "worker.py", persistent=True)["data"], "é")
+
+    def test_desynced_worker_is_replaced(self):
+        pid = within(30, request, "pid", "worker.py", persistent=True)["data"]
+
+        desynced = within(30, request, "junk", "worker.py", persistent=True)
+        self.assertFalse(desynced["request_status"])
+        self.assertTrue(any("invalid data" in error for error in desynced["errors"]))
+
+        replaced = within(30, request, "pid", "worker.py", persistent=True)
+        self.assertTrue(replaced["request_status"])
+        self.assertNotEqual(replaced["data"], pid)
+
+    def test_multiple_outputs(self):
+        response = within(30, request, 3, "worker.py", isUnique=False, persistent=True)
+        self.assertEqual(response["data"], [0, 1, 2])
+
+    def test_crash_respawns_worker(self):
+        pid = within(30, request, "pid", "worker.py", persistent=True)["data"]
+
+        crashed = within(30, request, "die", "worker.py", persistent=True)
+        self.assertFalse(crashed["request_status"])
+        self.assertIn("stderr: dead", crashed["errors"])
+
+        respawned = within(30, request, "pid", "worker.py", persistent=True)
+        self.assertTrue(respawned["request_status"])
+        self.assertNotEqual(respawned["data"], pid)
+
+    def test_target_without_serve_times_out(self):
+        start_timeout = mangledotdev._Worker.START_TIMEOUT
+        mangledotdev._Worker.START_TIMEOUT = 1
+        self.addCleanup(setattr, mangledotdev._Worker, "START_TIMEOUT", start_timeout)
+
+        response = within(30, request, "x", "echo.py", persistent=True)
+        self.assertFalse(response["request_status"])
+        self.assertTrue(any("didn't start OutputManager.serve()" in error for error in response["errors"]))
+
+    def test_other_languages_rejected(self):
+        manager = InputManager()
+        manager.request(data=1, language="js", file=target("noop.js"), persistent=True)
+        response = manager.get_response()
+        self.assertFalse(response["request_status"])
+        self.assertIn("only the Python implementation", response["errors"][0])
+
+    def test_shutdown_stops_workers(self):
+        pid = within(30, request, "pid", "worker.py", persistent=True)["data"]
+        within(30, InputManager.shutdown)
+        if os.name != "nt":
+            with self.assertRaises(ProcessLookupError):
+                os.kill(pid, 0)
+
+
+class FramingTests(unittest.TestCase):
+    """read_requests() and the frame helpers, without a child process."""
+
+    def setUp(self):
+        self.state = mangledotdev._OutputState()
+        self.stdout = io.BytesIO()
+        self.state.original_stdout = io.TextIOWrapper(self.stdout)
+
+    def test_line_mode_fallback(self):
+        stdin = io.BufferedReader(io.BytesIO(b'{"key": "1", "data": 1}\n\n{"cmd": "exit"}\n'))
+        requests = list(self.state.read_requests(stdin))
+        self.assertFalse(self.state.framed)
+        self.assertEqual(requests, [{"key": "1", "data": 1}, {"cmd": "exit"}])
+        self.assertEqual(self.stdout.getvalue(), b"")
+
+    def test_framed_mode_sends_sync_marker(self):
+        frames = b"".join(mangledotdev._frame_header(p) + p for p in (b'{"key": "1"}', b'{"cmd": "exit"}'))
+        stdin = io.BufferedReader(io.BytesIO(mangledotdev._PROTOCOL_FRAMED + frames))
+        requests = list(self.state.read_requests(stdin))
+        self.assertTrue(self.state.framed)
+        self.assertEqual(requests, [{"key": "1"}, {"cmd": "exit"}])
+        self.assertEqual(self.stdout.getvalue(), mangledotdev._SYNC_MARKER)
+
+    def test_skip_to_sync(self):
+        marker = mangledotdev._SYNC_MARKER
+        stdout = io.BufferedReader(io.BytesIO(b"load" + marker[:5] + b"x" + marker + b"\x00\x00\x00\x02{}"), buffer_size=8)
+        self.assertTrue(mangledotdev._skip_to_sync(stdout))
+        self.assertEqual(mangledotdev._read_frame(stdout), b"{}")
+
+    def test_oversized_frames_rejected(self):
+        with unittest.mock.patch.object(mangledotdev, "_MAX_FRAME", 16):
+            with self.assertRaises(ValueError):
+                mangledotdev._read_frame(io.BytesIO((17).to_bytes(4, "big") + b"x" * 17))
+
+            self.state.framed = True
+            with self.assertRaisesRegex(ValueError, "frame limit"):
+                self.state.send({"data": "x" * 16})
+            self.assertEqual(self.stdout.getvalue(), b"")
+
+
+class RequestManyTests(unittest.TestCase):
+
+    def test_runs_concurrently_in_order(self):
+        start = time.monotonic()
+        responses = within(60, InputManager.request_many, [
+            {"data": i, "language": "python", "file": target("slow.py")} for i in range(3)
+        ])
+        self.assertLess(time.monotonic() - start, 2.5)
+        self.assertEqual([r["data"] for r in responses], [0, 1, 2])
+
+    def test_long_response_line(self):
+        text = "é" * (4 << 20)
+        responses = within(60, InputManager.request_many, [
+            {"data": text, "language": "python", "file": target("echo.py")},
+            {"data": 3, "language": "python", "file": target("multi.py"), "isUnique": False},
+        ])
+        self.assertEqual(responses[0]["data"], text)
+        self.assertEqual(responses[1]["data"], [0, 1, 2])
+
+    def test_failures_are_per_request(self):
+        responses = within(60, InputManager.request_many, [
+            {"data": 1, "language": "python", "file": target("echo.py")},
+            {"data": 2, "language": "python", "file": target("echo.py"), "persistent": False},
+            {"data": 3, "language": "python", "file": target("echo.py"), "persistent": True},
+            {"data": 4, "language": "python", "file": target("echo.py"), "bogus": 1},
+            {"data": 5, "language": "python", "file": target("missing.py")},
+            None,
+            {"data": 2, "language": "python", "file": target("crash.py")},
+        ])
+        self.assertEqual([r["request_status"] for r in responses], [True, True, False, False, False, False, False])
+        self.assertEqual(responses[1]["data"], 2)
+        self.assertIn("persistent", responses[2]["errors"][0])
+        self.assertIn("bogus", responses[3]["errors"][0])
+        self.assertIn("stderr: boom", responses[6]["errors"])
+
+
+@unittest.skipIf(os.name == "nt", "shared memory transport is POSIX only")
+class SharedMemoryTests(unittest.TestCase):
+    """Run in a child interpreter, as the transport is switched on at import time."""
+
+    DRIVER = """
+        import json, os, subprocess, sys
+        sys.path.insert(0, {module_dir!r})
+        import mangledotdev
+        from mangledotdev import InputManager
+
+        target_dir = {target_dir!r}
+        payload = os.urandom(1 << 20)
+        results = []
+        for file, persistent in (("reverse.py", False), ("reverse_worker.py", True), ("reverse_worker.py", True)):
+            manager = InputManager()
+            manager.request(data=payload, language="python", file=os.path.join(target_dir, file), persistent=persistent)
+            response = manager.get_response()
+            results.append([response["errors"], response["data"] == payload[::-1]])
+
+        workers = InputManager._InputManager__workers
+        worker_stderr = b"".join(b"".join(worker.stderr) for worker in workers.values()).decode()
+        InputManager.shutdown()
+
+        # Run a one-shot target by hand to see its stderr up to exit
+        desc, shm = mangledotdev._shm_put(payload)
+        request = mangledotdev._dumps({{"key": "1", "data": desc, "isUnique": True, "optionalOutput": True}})
+        child = subprocess.run([sys.executable, os.path.join(target_dir, "reverse.py")], input=request, capture_output=True)
+        shm.close()
+        shm.unlink()
+
+        print(json.dumps({{"results": results, "worker_stderr": worker_stderr, "oneshot_stderr": child.stderr.decode()}}))
+    """
+
+    def test_round_trip(self):
+        driver = textwrap.dedent(self.DRIVER).format(module_dir=MODULE_DIR, target_dir=target_dir)
+        env = dict(os.environ, MANGLE_SHM_ENABLE="1")
+        result = subprocess.run([sys.executable, "-c", driver], env=env, capture_output=True, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stderr, b"")
+
+        report = json.loads(result.stdout)
+        self.assertEqual(report["results"], [[[], True]] * 3)
+        self.assertEqual(report["worker_stderr"], "")
+        self.assertEqual(report["oneshot_stderr"], "")
+
+
+class TextStreamTests(unittest.TestCase):
+    """OutputManager with stdin/stdout replaced by objects without file descriptors."""
+
+    def setUp(self):
+        self.state = mangledotdev._OutputState()
+        self.stdout = io.StringIO()
+        self.addCleanup(setattr, sys, "stdin", sys.stdin)
+        self.addCleanup(setattr, sys, "stdout", sys.stdout)
+
+    def run_target(self, stdin, target):
+        sys.stdin = io.StringIO(stdin)
+        sys.stdout = self.stdout
+        try:
+            target()
+        finally:
+            # The null device opened in place of the harness stdout
+            if sys.stdout is not self.stdout:
+                sys.stdout.close()
+            sys.stdout = sys.__stdout__
+        return [json.loads(line) for line in self.stdout.getvalue().splitlines()]
+
+    def test_serve(self):
+        lines = self.run_target(
+            '{"key": "1", "data": 1, "isUnique": true, "optionalOutput": true}\n'
+            '{"key": "2", "data": "é", "isUnique": true, "optionalOutput": true}\n'
+            '{"cmd": "exit"}\n',
+            lambda: self.state.serve(self.state.output)
+        )
+        self.assertEqual(lines, [
+            {"key": "1", "request_status": True, "data": 1, "optionalOutput": True, "isUnique": True, "errors": [], "warnings": []},
+            {"key": "1", "final": True},
+            {"key": "2", "request_status": True, "data": "é", "optionalOutput": True, "isUnique": True, "errors": [], "warnings": []},
+            {"key": "2", "final": True},
+        ])
+
+    def test_init_reads_text_stdin(self):
+        def target():
+            self.state.init()
+            self.state.output(self.state.data)
+
+        lines = self.run_target('{"key": "1", "data": ["é", 2], "isUnique": true, "optionalOutput": true}', target)
+        self.assertEqual([line["data"] for line in lines], [["é", 2]])
+
+    def test_repeated_suppress_keeps_real_stdout(self):
+        def target():
+            self.state.suppress_stdout()
+            self.state.suppress_stdout()
+            print("hidden")
+            self.state.send({"a": 1})
+
+        self.assertEqual(self.run_target("", target), [{"a": 1}])
+
+
+if __name__ == "__main__":
+    unittest.main()